@@ -1,12 +1,23 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import datetime
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import math
 import re
+import json
+import functools
+import hmac
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dateutil import parser, relativedelta
 from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
+from geopy.exc import GeopyError
 
 # IMPORT FLIGHT RELIABILITY MODULE
 try:
@@ -15,6 +26,15 @@ try:
 except ImportError:
     HAS_FRA = False
 
+# FAST JSON DECODING (optional; falls back to stdlib json)
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+from modules.cache import load_coords, save_coords, load_flights, save_flights, load_web_hours, save_web_hours, load_route, save_route
+
 # ==============================================================================
 # 1. VISUAL CONFIGURATION
 # ==============================================================================
@@ -79,12 +99,28 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Logistics chain timeline; filled per run with str.format_map
+CHAIN_HTML = """
+    <div class="timeline-container">
+        <div class="timeline-point"><div style="font-size:24px">📦</div><div style="font-weight:bold">Pickup</div><div style="color:#4ade80; font-size: 0.8rem;">{pickup_date}</div><div style="color:#4ade80">{pickup_time}</div></div>
+        <div class="timeline-line"></div>
+        <div class="timeline-point"><div style="font-size:24px">🚛</div><div style="font-size:12px; color:#94a3b8">{drive_time}</div></div>
+        <div class="timeline-line"></div>
+        <div class="timeline-point"><div style="font-size:24px">🛫</div><div style="font-weight:bold">Departs</div><div style="color:#facc15; font-size: 0.8rem;">{dep_date}</div><div style="color:#facc15">{dep_time}</div></div>
+        <div class="timeline-line"></div>
+        <div class="timeline-point"><div style="font-size:24px">🛬</div><div style="font-weight:bold">Arrives</div><div style="color:#facc15; font-size: 0.8rem;">{arr_date}</div><div style="color:#facc15">{arr_time}</div></div>
+        <div class="timeline-line"></div>
+        <div class="timeline-point"><div style="font-size:24px">🏁</div><div style="font-weight:bold">Deadline</div><div style="color:#f87171; font-size: 0.8rem;">{deadline_date}</div><div style="color:#f87171">{deadline_time}</div></div>
+    </div>
+    """
+
 # ==============================================================================
 # 2. SECURITY & API KEY LOADING
 # ==============================================================================
 def check_password():
     def password_entered():
-        if st.session_state["password"] == st.secrets["APP_PASSWORD"]:
+        # Constant-time compare so response timing doesn't leak how much of the code matched
+        if hmac.compare_digest(st.session_state["password"].encode(), st.secrets["APP_PASSWORD"].encode()):
             st.session_state["password_correct"] = True
             del st.session_state["password"]
         else:
@@ -116,123 +152,292 @@ if not AVIATION_EDGE_KEY:
 # ==============================================================================
 # 3. LOGISTICS ENGINE (Real-Time)
 # ==============================================================================
+_HHMM = re.compile(r'^(\d{1,2}):(\d{2})$')
+_CLOCK = re.compile(r'(\d{1,2}):(\d{2})')
+EARTH_RADIUS_MI = 3958.7613
+MAX_FLIGHTS = 20
+NOMINATIM_MIN_INTERVAL_SEC = 1.0  # Nominatim usage policy: at most one request per second
+
+def _hhmm_to_min(s):
+    # "H:MM"/"HH:MM" -> minute of day, or None if the string isn't a clock time
+    m = _HHMM.match(s)
+    return int(m.group(1)) * 60 + int(m.group(2)) if m else None
+
+@functools.lru_cache(maxsize=512)
+def _parse_hours(range_str):
+    # Parsed once per distinct hours string: False = closed, None = open/unknown, else (start_min, end_min)
+    if any(x in range_str.lower() for x in ["no cargo", "closed", "n/a"]): return False
+    if "24" in range_str or "daily" in range_str: return None
+    times = _CLOCK.findall(range_str)
+    if len(times) != 2: return None
+    (h1, m1), (h2, m2) = times
+    if int(h1) > 23 or int(h2) > 23 or int(m1) > 59 or int(m2) > 59: return None
+    return (int(h1) * 60 + int(m1), int(h2) * 60 + int(m2))
+
+# Fixed-format specializations of strftime for the rerun/flight-loop paths
+def _ymd(d): return f"{d.year:04d}-{d.month:02d}-{d.day:02d}"
+def _hm(t): return f"{t.hour:02d}:{t.minute:02d}"
+# Master-file hours column for a date: Mon-Fri share "weekday"
+def _day_col(d): return {5: "saturday", 6: "sunday"}.get(d.weekday(), "weekday")
+
+def _parse_dt(s):
+    # API timestamps are ISO-shaped ("2024-05-01 08:15", "2024-05-01T08:15:00.000"); fromisoformat is the C fast path
+    try: return datetime.datetime.fromisoformat(s).replace(tzinfo=None)
+    except ValueError: return parser.parse(s).replace(tzinfo=None)
+
+def _haversine_miles(a, b):
+    # Great-circle distance between two (lat, lon) pairs; plenty for ranking airports and drive estimates
+    lat1, lon1, lat2, lon2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MI * math.asin(math.sqrt(h))
+
+@st.cache_resource(show_spinner=False)
+def get_http():
+    # One keep-alive connection pool for every outbound call; safe to share across worker threads
+    session = requests.Session()
+    session.headers["User-Agent"] = "CargoApp/1.0"
+    retry = Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+    session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=retry))
+    return session
+
+# Pickup and delivery resolve concurrently; Nominatim calls queue here and go out 1 s apart
+_nominatim_lock = threading.Lock()
+_nominatim_last = [0.0]
+
+def _nominatim_geocode(geolocator, query):
+    with _nominatim_lock:
+        wait = _nominatim_last[0] + NOMINATIM_MIN_INTERVAL_SEC - time.monotonic()
+        if wait > 0: time.sleep(wait)
+        try: return geolocator.geocode(query)
+        finally: _nominatim_last[0] = time.monotonic()
+
+# Network lookups are pure functions of primitive inputs, so memoize them across reruns
+@st.cache_data(ttl=3600, max_entries=2048, show_spinner=False)
+def _geocode(location, _geolocator):
+    # None only when no provider has the address (ZERO_RESULTS / empty Nominatim answer); timeouts,
+    # throttling and outages raise so st.cache_data never keeps them as a miss
+    google_err = None
+    if GOOGLE_MAPS_KEY:
+        try:
+            url = "https://maps.googleapis.com/maps/api/geocode/json"
+            params = {"address": location, "key": GOOGLE_MAPS_KEY}
+            r = get_http().get(url, params=params, timeout=5)
+            r.raise_for_status()
+            data = _json_loads(r.content)
+            if data['status'] == 'OK': return (data['results'][0]['geometry']['location']['lat'], data['results'][0]['geometry']['location']['lng'])
+            if data['status'] != 'ZERO_RESULTS': raise ValueError(f"Google geocoding returned {data['status']}")
+        except (requests.RequestException, ValueError, KeyError, IndexError) as e: google_err = e
+    clean = location.replace("Suite", "").replace("#", "").split(",")[0] + ", " + location.split(",")[-1]
+    loc = _nominatim_geocode(_geolocator, clean)
+    if loc: return (loc.latitude, loc.longitude)
+    # Nominatim has nothing either; that is only a real miss if Google answered rather than failed
+    if google_err is not None: raise google_err
+    return None
+
+@st.cache_data(ttl=86400, max_entries=512, show_spinner=False)
+def _osrm_route(lat1, lon1, lat2, lon2):
+    # OSRM has no traffic model, so a route stays good for weeks; recurring lanes skip the call entirely
+    cached = load_route(lat1, lon1, lat2, lon2)
+    if cached: return cached
+    # Errors and non-"Ok" codes raise so a throttled or failed call is never cached for the day
+    url = f"https://router.project-osrm.org/route/v1/driving/{lon1},{lat1};{lon2},{lat2}"
+    r = get_http().get(url, params={"overview": "false"}, timeout=15)
+    r.raise_for_status()
+    data = _json_loads(r.content)
+    if data.get("code") != "Ok": raise ValueError(f"OSRM returned {data.get('code')}")
+    sec = data['routes'][0]['duration']
+    metrics = {"miles": round(data['routes'][0]['distance'] * 0.000621371, 1), "time_str": f"{int(sec // 3600)}h {int((sec % 3600) // 60)}m", "time_min": round(sec/60)}
+    save_route(lat1, lon1, lat2, lon2, metrics)
+    return metrics
+
+@st.cache_data(ttl=600, max_entries=256, show_spinner=False)
+def _serp_flights(origin, dest, date, show_all_airlines):
+    # Errors propagate so a transient failure is never cached as "no flights"
+    params = {"engine": "google_flights", "departure_id": origin, "arrival_id": dest, "outbound_date": date, "type": "2", "hl": "en", "gl": "us", "currency": "USD", "api_key": SERPAPI_KEY}
+    # Only the flight lists are read; SerpApi's JSON restrictor drops price insights, airports, booking data
+    params["json_restrictor"] = "best_flights,other_flights"
+    if not show_all_airlines: params["include_airlines"] = "WN,AA,DL,UA"
+    # Google Flights scrapes can take several seconds; still bound it so a stalled socket can't hang the run
+    r = get_http().get("https://serpapi.com/search", params=params, timeout=30)
+    r.raise_for_status()
+    data = _json_loads(r.content)
+    if "error" in data: raise ValueError(data["error"])
+    results, seen = [], set()
+    raw = itertools.chain(data.get("best_flights") or (), data.get("other_flights") or ())
+    for f in itertools.islice(raw, MAX_FLIGHTS):
+        legs = f.get('flights', [])
+        if not legs: continue
+        airline = legs[0].get('airline', 'UNK')
+        flight_no = " / ".join([l.get('flight_number', '') for l in legs])
+        dep_full = legs[0].get('departure_airport', {}).get('time', '')
+        # best_flights and other_flights can list the same itinerary
+        if (airline, flight_no, dep_full) in seen: continue
+        seen.add((airline, flight_no, dep_full))
+        layovers = f.get('layovers', [])
+        conn_apt = layovers[0].get('id', 'Direct') if layovers else "Direct"
+        conn_min = layovers[0].get('duration', 0) if layovers else 0
+        arr_full = legs[-1].get('arrival_airport', {}).get('time', '')
+        results.append({
+            "Airline": airline,
+            "Flight": flight_no,
+            "Dep Time": dep_full.split()[-1], "Dep Full": dep_full,
+            "Arr Time": arr_full.split()[-1], "Arr Full": arr_full,
+            "Conn Apt": conn_apt, "Conn Min": conn_min
+        })
+    return results
+
+@st.cache_data(ttl=3600, max_entries=1024, show_spinner=False)
+def _serp_cargo_hours(airline, airport_code, day_name):
+    # Web snippet for airlines missing from the master file; errors propagate so they aren't cached
+    snip = load_web_hours(airline, airport_code, day_name)
+    if snip is not None: return snip
+    params = {"engine": "google", "q": f"{airline} cargo hours {airport_code} {day_name}", "api_key": SERPAPI_KEY, "num": 1, "json_restrictor": "organic_results"}
+    r = get_http().get("https://serpapi.com/search", params=params, timeout=5)
+    r.raise_for_status()
+    data = _json_loads(r.content)
+    if "error" in data: raise ValueError(data["error"])
+    snip = (data.get("organic_results") or [{}])[0].get("snippet")
+    if snip is None: return "No data"
+    # Only a snippet that was actually returned is worth keeping for the week
+    save_web_hours(airline, airport_code, day_name, snip)
+    return snip
+
 class LogisticsTools:
+    AIRPORT_DB = {
+        "SEA": {"name": "Seattle-Tacoma Intl", "coords": (47.4489, -122.3094)},
+        "PDX": {"name": "Portland Intl", "coords": (45.5887, -122.5975)},
+        "SFO": {"name": "San Francisco Intl", "coords": (37.6189, -122.3748)},
+        "LAX": {"name": "Los Angeles Intl", "coords": (33.9425, -118.4080)},
+        "ORD": {"name": "Chicago O'Hare Intl", "coords": (41.9742, -87.9073)},
+        "DFW": {"name": "Dallas/Fort Worth Intl", "coords": (32.8998, -97.0403)},
+        "JFK": {"name": "John F. Kennedy Intl", "coords": (40.6413, -73.7781)},
+        "ATL": {"name": "Hartsfield-Jackson Atlanta", "coords": (33.6407, -84.4277)},
+        "MIA": {"name": "Miami Intl", "coords": (25.7959, -80.2870)},
+        "CLT": {"name": "Charlotte Douglas Intl", "coords": (35.2140, -80.9431)},
+        "MEM": {"name": "Memphis Intl", "coords": (35.0424, -89.9767)},
+        "CVG": {"name": "Cincinnati/N Kentucky", "coords": (39.0461, -84.6621)},
+        "DEN": {"name": "Denver Intl", "coords": (39.8561, -104.6737)},
+        "PHX": {"name": "Phoenix Sky Harbor", "coords": (33.4343, -112.0116)},
+        "IAH": {"name": "George Bush Intercontinental", "coords": (29.9902, -95.3368)},
+        "BOS": {"name": "Logan Intl", "coords": (42.3656, -71.0096)},
+        "EWR": {"name": "Newark Liberty Intl", "coords": (40.6895, -74.1745)},
+        "MCO": {"name": "Orlando Intl", "coords": (28.4312, -81.3081)},
+        "LGA": {"name": "LaGuardia", "coords": (40.7769, -73.8740)},
+        "DTW": {"name": "Detroit Metro", "coords": (42.2162, -83.3554)},
+        "MSP": {"name": "Minneapolis–Saint Paul", "coords": (44.8848, -93.2223)},
+        "SLC": {"name": "Salt Lake City Intl", "coords": (40.7899, -111.9791)},
+        "STL": {"name": "St. Louis Lambert Intl", "coords": (38.7487, -90.3700)}
+    }
+    # Parallel arrays so the nearest-airport scan is one vectorized haversine; built once at import
+    _apt_codes = np.array(list(AIRPORT_DB))
+    _apt_names = np.array([v["name"] for v in AIRPORT_DB.values()])
+    _apt_lat = np.radians([v["coords"][0] for v in AIRPORT_DB.values()])
+    _apt_lon = np.radians([v["coords"][1] for v in AIRPORT_DB.values()])
+
     def __init__(self):
-        self.geolocator = Nominatim(user_agent="cargo_command_v59_interactive", timeout=10)
-        self.master_df = None
+        self.http = get_http()
+        self._hours_idx, self._airlines_by_code, self._apt_by_code = {}, {}, {}
         try:
-            self.master_df = pd.read_csv("cargo_master.csv")
-            self.master_df.columns = [c.strip().lower().replace(" ", "_") for c in self.master_df.columns]
+            # The master file is only read here: everything below is distilled into dicts and arrays,
+            # and the frame itself is dropped when __init__ returns
+            df = pd.read_csv("cargo_master.csv")
+            df.columns = [c.strip().lower().replace(" ", "_") for c in df.columns]
+            df.set_index('airport_code', inplace=True)
+            # (code, airline) -> hours row (first row per pair), plus each airport's airlines in file order so
+            # get_cargo_hours can take the first containing match, as the old str.contains mask + iloc[0] did
+            for code, al, wk, sat, sun in zip(df.index, df['airline'].fillna("").str.lower(), df['weekday'], df['saturday'], df['sunday']):
+                if (code, al) in self._hours_idx: continue
+                self._hours_idx[(code, al)] = {"weekday": wk, "saturday": sat, "sunday": sun}
+                self._airlines_by_code.setdefault(code, []).append(al)
+            # code -> {"name", "coords"} in AIRPORT_DB's shape; first row per code, as with the old .loc lookup
+            first = df[~df.index.duplicated()]
+            self._apt_by_code = {code: {"name": name, "coords": (lat, lon)} for code, name, lat, lon in zip(first.index, first['airport_name'], first['latitude_deg'], first['longitude_deg'])}
+            # Master-file airports join AIRPORT_DB in the nearest-airport arrays (one row per code; the
+            # master row wins, matching the lookup order in _get_coords and get_airport_details)
+            apts = first.dropna(subset=['latitude_deg', 'longitude_deg'])
+            apt_codes = apts.index.astype(str).to_numpy()
+            keep = ~np.isin(self._apt_codes, apt_codes)
+            self._apt_codes, self._apt_names, self._apt_lat, self._apt_lon = (
+                np.concatenate([self._apt_codes[keep], apt_codes]),
+                np.concatenate([self._apt_names[keep], apts['airport_name'].astype(str).to_numpy()]),
+                np.concatenate([self._apt_lat[keep], np.radians(apts['latitude_deg'].to_numpy(dtype=np.float64))]),
+                np.concatenate([self._apt_lon[keep], np.radians(apts['longitude_deg'].to_numpy(dtype=np.float64))]))
         except: pass
-        
-        self.AIRPORT_DB = {
-            "SEA": {"name": "Seattle-Tacoma Intl", "coords": (47.4489, -122.3094)},
-            "PDX": {"name": "Portland Intl", "coords": (45.5887, -122.5975)},
-            "SFO": {"name": "San Francisco Intl", "coords": (37.6189, -122.3748)},
-            "LAX": {"name": "Los Angeles Intl", "coords": (33.9425, -118.4080)},
-            "ORD": {"name": "Chicago O'Hare Intl", "coords": (41.9742, -87.9073)},
-            "DFW": {"name": "Dallas/Fort Worth Intl", "coords": (32.8998, -97.0403)},
-            "JFK": {"name": "John F. Kennedy Intl", "coords": (40.6413, -73.7781)},
-            "ATL": {"name": "Hartsfield-Jackson Atlanta", "coords": (33.6407, -84.4277)},
-            "MIA": {"name": "Miami Intl", "coords": (25.7959, -80.2870)},
-            "CLT": {"name": "Charlotte Douglas Intl", "coords": (35.2140, -80.9431)},
-            "MEM": {"name": "Memphis Intl", "coords": (35.0424, -89.9767)},
-            "CVG": {"name": "Cincinnati/N Kentucky", "coords": (39.0461, -84.6621)},
-            "DEN": {"name": "Denver Intl", "coords": (39.8561, -104.6737)},
-            "PHX": {"name": "Phoenix Sky Harbor", "coords": (33.4343, -112.0116)},
-            "IAH": {"name": "George Bush Intercontinental", "coords": (29.9902, -95.3368)},
-            "BOS": {"name": "Logan Intl", "coords": (42.3656, -71.0096)},
-            "EWR": {"name": "Newark Liberty Intl", "coords": (40.6895, -74.1745)},
-            "MCO": {"name": "Orlando Intl", "coords": (28.4312, -81.3081)},
-            "LGA": {"name": "LaGuardia", "coords": (40.7769, -73.8740)},
-            "DTW": {"name": "Detroit Metro", "coords": (42.2162, -83.3554)},
-            "MSP": {"name": "Minneapolis–Saint Paul", "coords": (44.8848, -93.2223)},
-            "SLC": {"name": "Salt Lake City Intl", "coords": (40.7899, -111.9791)},
-            "STL": {"name": "St. Louis Lambert Intl", "coords": (38.7487, -90.3700)}
-        }
+
+    @functools.cached_property
+    def geolocator(self):
+        # Only built on the first address that misses every local and cached source
+        return Nominatim(user_agent="cargo_command_v59_interactive", timeout=10)
 
     def _get_coords(self, location: str):
-        if self.master_df is not None and len(location) == 3:
-            match = self.master_df[self.master_df['airport_code'] == location.upper()]
-            if not match.empty: return (match.iloc[0]['latitude_deg'], match.iloc[0]['longitude_deg'])
-        if location.upper() in self.AIRPORT_DB: return self.AIRPORT_DB[location.upper()]["coords"]
-        if GOOGLE_MAPS_KEY:
-            try:
-                url = "https://maps.googleapis.com/maps/api/geocode/json"
-                params = {"address": location, "key": GOOGLE_MAPS_KEY}
-                r = requests.get(url, params=params, timeout=5)
-                data = r.json()
-                if data['status'] == 'OK': return (data['results'][0]['geometry']['location']['lat'], data['results'][0]['geometry']['location']['lng'])
-            except: pass
-        try:
-            clean = location.replace("Suite", "").replace("#", "").split(",")[0] + ", " + location.split(",")[-1]
-            loc = self.geolocator.geocode(clean)
-            if loc: return (loc.latitude, loc.longitude)
-        except: pass
-        return None
+        # Repeats are answered by the _geocode cache and the SQLite store, not an engine-level dict
+        code = location.upper()
+        if len(code) == 3:
+            # Airport codes (every p_code/d_code leg endpoint) resolve from local tables without touching pandas
+            if code in self._apt_by_code: return self._apt_by_code[code]["coords"]
+            if code in self.AIRPORT_DB: return self.AIRPORT_DB[code]["coords"]
+        cached = load_coords(location)
+        if cached is not None: return cached or None
+        # A failed lookup returns None for this call only: nothing is memoized or persisted
+        try: coords = _geocode(location, self.geolocator)
+        except (GeopyError, requests.RequestException, ValueError, KeyError, IndexError): return None
+        # Reaching here means the providers answered, so a None is a real no-result and safe to persist
+        save_coords(location, coords)
+        return coords
 
     def get_airport_details(self, code):
         code = code.upper()
         if AVIATION_EDGE_KEY:
             try:
-                r = requests.get("https://aviation-edge.com/v2/public/airportDatabase", params={"key": AVIATION_EDGE_KEY, "codeIataAirport": code}, timeout=5)
-                d = r.json()
+                r = self.http.get("https://aviation-edge.com/v2/public/airportDatabase", params={"key": AVIATION_EDGE_KEY, "codeIataAirport": code}, timeout=5)
+                d = _json_loads(r.content)
                 if d and isinstance(d, list): return {"code": code, "name": d[0].get("nameAirport", code), "coords": (float(d[0]['latitudeAirport']), float(d[0]['longitudeAirport']))}
             except: pass
-        if self.master_df is not None:
-            match = self.master_df[self.master_df['airport_code'] == code]
-            if not match.empty: return {"code": code, "name": match.iloc[0]['airport_name'], "coords": (match.iloc[0]['latitude_deg'], match.iloc[0]['longitude_deg'])}
+        if code in self._apt_by_code: return {"code": code, **self._apt_by_code[code]}
         if code in self.AIRPORT_DB: return {"code": code, "name": self.AIRPORT_DB[code]["name"], "coords": self.AIRPORT_DB[code]["coords"]}
         return None
 
     def get_cargo_hours(self, airport_code, airline, date_obj):
         day_name = date_obj.strftime("%A")
-        col_map = {"Saturday": "saturday", "Sunday": "sunday"}
-        day_col = col_map.get(day_name, "weekday") 
-        if self.master_df is not None:
-            mask = (self.master_df['airport_code'] == airport_code) & (self.master_df['airline'].str.contains(airline, case=False, na=False))
-            row = self.master_df[mask]
-            if not row.empty:
-                hours_str = str(row.iloc[0][day_col])
-                if any(x in hours_str.lower() for x in ['nan', 'closed', 'n/a', 'no cargo']): return {"status": "Closed", "hours": "No Cargo", "source": "Master File"}
-                return {"status": "Open", "hours": hours_str, "source": "Master File"}
-        url = "https://serpapi.com/search"
+        day_col = _day_col(date_obj)
+        al = airline.lower()
+        # First airline at this airport containing the name, in file order; an exact name does not jump the
+        # queue (GTF lists "Delta Connection" ahead of "Delta", and "Delta" has always matched that row)
+        hit = next((a for a in self._airlines_by_code.get(airport_code, ()) if al in a), None)
+        row = self._hours_idx[(airport_code, hit)] if hit is not None else None
+        if row is not None:
+            hours_str = str(row[day_col])
+            if any(x in hours_str.lower() for x in ['nan', 'closed', 'n/a', 'no cargo']): return {"status": "Closed", "hours": "No Cargo", "source": "Master File"}
+            return {"status": "Open", "hours": hours_str, "source": "Master File"}
         if SERPAPI_KEY:
             try:
-                r = requests.get(url, params={"engine": "google", "q": f"{airline} cargo hours {airport_code} {day_name}", "api_key": SERPAPI_KEY, "num": 1}, timeout=5)
-                snip = r.json().get("organic_results", [{}])[0].get("snippet", "No data")
+                snip = _serp_cargo_hours(airline, airport_code, day_name)
                 return {"status": "Unverified", "hours": f"Web: {snip[:40]}...", "source": "Web Search"}
             except: pass
         return {"status": "Unknown", "hours": "Unknown", "source": "No Data"}
 
-    def check_time_in_range(self, target_time, range_str):
-        if any(x in range_str.lower() for x in ["no cargo", "closed", "n/a"]): return False
-        if "24" in range_str or "daily" in range_str: return True
-        try:
-            times = re.findall(r'\d{1,2}:\d{2}', range_str)
-            if len(times) != 2: return True
-            start, end = datetime.datetime.strptime(times[0], "%H:%M").time(), datetime.datetime.strptime(times[1], "%H:%M").time()
-            check = datetime.datetime.strptime(target_time, "%H:%M").time()
-            if start <= end: return start <= check <= end
-            else: return start <= check or check <= end
-        except: return True
+    def check_minute_in_range(self, check, range_str):
+        # check is minutes past midnight (None = unknown); the hot loop calls this directly
+        window = _parse_hours(range_str)
+        if window is False: return False
+        if window is None or check is None: return True
+        start, end = window
+        if start <= end: return start <= check <= end
+        else: return start <= check or check <= end
 
     def get_next_open_time(self, current_dt, hours_str):
-        if "24" in hours_str or "Daily" in hours_str or not re.search(r'\d{1,2}:\d{2}', hours_str):
-            return current_dt
-        try:
-            times = re.findall(r'\d{1,2}:\d{2}', hours_str)
-            start_t = datetime.datetime.strptime(times[0], "%H:%M").time()
-            start_dt = current_dt.replace(hour=start_t.hour, minute=start_t.minute, second=0, microsecond=0)
-            if current_dt.time() < start_t:
-                return start_dt
-            else:
-                end_t = datetime.datetime.strptime(times[1], "%H:%M").time()
-                if start_t > end_t and (current_dt.time() > start_t or current_dt.time() < end_t):
-                    return current_dt 
+        times = _CLOCK.findall(hours_str)
+        if "24" in hours_str or "Daily" in hours_str or not times: return current_dt
+        # Minute-of-day bounds from the precompiled clock regex; None marks an invalid clock value
+        start, end = ([int(h) * 60 + int(m) if int(h) < 24 and int(m) < 60 else None for h, m in times[:2]] + [None])[:2]
+        if start is not None:
+            start_dt = current_dt.replace(hour=start // 60, minute=start % 60, second=0, microsecond=0)
+            cur = current_dt.hour * 60 + current_dt.minute
+            if cur < start: return start_dt
+            if end is not None:
+                if start > end and (cur > start or cur < end): return current_dt
                 return start_dt + datetime.timedelta(days=1)
-        except:
-            return current_dt.replace(hour=9, minute=0, second=0, microsecond=0) + datetime.timedelta(days=1)
+        return current_dt.replace(hour=9, minute=0, second=0, microsecond=0) + datetime.timedelta(days=1)
 
     def find_nearest_airports(self, address: str):
         user_coords = self._get_coords(address)
@@ -240,16 +445,18 @@ class LogisticsTools:
         candidates = []
         if AVIATION_EDGE_KEY:
             try:
-                r = requests.get("https://aviation-edge.com/v2/public/nearby", params={"key": AVIATION_EDGE_KEY, "lat": user_coords[0], "lng": user_coords[1], "distance": 150}, timeout=8)
-                for apt in r.json():
+                r = self.http.get("https://aviation-edge.com/v2/public/nearby", params={"key": AVIATION_EDGE_KEY, "lat": user_coords[0], "lng": user_coords[1], "distance": 150}, timeout=8)
+                for apt in _json_loads(r.content):
                     if len(apt.get("codeIataAirport", "")) == 3: candidates.append({"code": apt.get("codeIataAirport").upper(), "name": apt.get("nameAirport"), "air_miles": round(float(apt.get("distance")) * 0.621371, 1)})
             except: pass
         if not candidates:
-            for code, data in self.AIRPORT_DB.items():
-                dist = geodesic(user_coords, data["coords"]).miles
-                candidates.append({"code": code, "name": data["name"], "air_miles": round(dist, 1)})
-        candidates.sort(key=lambda x: x["air_miles"])
-        return candidates[:3]
+            lat0, lon0 = math.radians(user_coords[0]), math.radians(user_coords[1])
+            a = np.sin((self._apt_lat - lat0) / 2) ** 2 + np.cos(lat0) * np.cos(self._apt_lat) * np.sin((self._apt_lon - lon0) / 2) ** 2
+            miles = 2 * EARTH_RADIUS_MI * np.arcsin(np.sqrt(a))
+            for i in np.argpartition(miles, 2)[:3]:
+                candidates.append({"code": str(self._apt_codes[i]), "name": str(self._apt_names[i]), "air_miles": round(float(miles[i]), 1)})
+        # Aviation Edge can list dozens of airports within 150 km; only the closest three are kept
+        return heapq.nsmallest(3, candidates, key=lambda x: x["air_miles"])
 
     def get_road_metrics(self, origin: str, destination: str):
         coords_start = self._get_coords(origin)
@@ -259,86 +466,67 @@ class LogisticsTools:
             try:
                 url = "https://maps.googleapis.com/maps/api/distancematrix/json"
                 params = {"origins": f"{coords_start[0]},{coords_start[1]}", "destinations": f"{coords_end[0]},{coords_end[1]}", "mode": "driving", "traffic_model": "best_guess", "departure_time": "now", "key": GOOGLE_MAPS_KEY}
-                r = requests.get(url, params=params, timeout=8)
-                data = r.json()
+                r = self.http.get(url, params=params, timeout=8)
+                data = _json_loads(r.content)
                 if data['status'] == 'OK':
                     elem = data['rows'][0]['elements'][0]
                     if elem['status'] == 'OK': return {"miles": round(elem['distance']['value'] * 0.000621371, 1), "time_str": f"{int(elem.get('duration_in_traffic', elem['duration'])['value'] // 3600)}h {int((elem.get('duration_in_traffic', elem['duration'])['value'] % 3600) // 60)}m", "time_min": round(elem.get('duration_in_traffic', elem['duration'])['value']/60)}
             except: pass
-        url = f"https://router.project-osrm.org/route/v1/driving/{coords_start[1]},{coords_start[0]};{coords_end[1]},{coords_end[0]}"
-        try:
-            r = requests.get(url, params={"overview": "false"}, headers={"User-Agent": "CargoApp/1.0"}, timeout=15)
-            data = r.json()
-            if data.get("code") == "Ok":
-                sec = data['routes'][0]['duration']
-                return {"miles": round(data['routes'][0]['distance'] * 0.000621371, 1), "time_str": f"{int(sec // 3600)}h {int((sec % 3600) // 60)}m", "time_min": round(sec/60)}
-        except: pass
-        dist = geodesic(coords_start, coords_end).miles * 1.3
+        try: return _osrm_route(float(coords_start[0]), float(coords_start[1]), float(coords_end[0]), float(coords_end[1]))
+        except (requests.RequestException, ValueError, KeyError, IndexError): pass
+        dist = _haversine_miles(coords_start, coords_end) * 1.3
         return {"miles": round(dist, 1), "time_str": f"{int((dist/50) + 0.5)}h {int(((dist/50) + 0.5)*60)%60}m (Est)", "time_min": int(((dist/50) + 0.5)*60)}
 
     def search_flights(self, origin, dest, date, show_all_airlines=False):
+        results = load_flights(origin, dest, date, show_all_airlines)
+        if results is None:
+            results = self._fetch_flights(origin, dest, date, show_all_airlines)
+            if results: save_flights(origin, dest, date, show_all_airlines, results)
+        for f in results: f['Dep Min'] = _hhmm_to_min(f['Dep Time'])
+        return results
+
+    def _fetch_flights(self, origin, dest, date, show_all_airlines):
         if AVIATION_EDGE_KEY:
             try:
-                r = requests.get("https://aviation-edge.com/v2/public/flightsFuture", params={"key": AVIATION_EDGE_KEY, "type": "departure", "iataCode": origin, "date": date, "arr_iataCode": dest}, timeout=10)
-                data = r.json()
+                r = self.http.get("https://aviation-edge.com/v2/public/flightsFuture", params={"key": AVIATION_EDGE_KEY, "type": "departure", "iataCode": origin, "date": date, "arr_iataCode": dest}, timeout=10)
+                data = _json_loads(r.content)
                 if isinstance(data, list):
-                    results = []
+                    results, seen = [], set()
                     for f in data:
                         airline = f.get('airline', {}).get('iataCode', 'UNK')
                         if not show_all_airlines and airline not in ["WN","AA","DL","UA"]: continue
                         dep_time = f.get('departure', {}).get('scheduledTime', '')
                         arr_time = f.get('arrival', {}).get('scheduledTime', '')
                         if not dep_time or not arr_time: continue
-                        try:
-                            dur = (datetime.datetime.strptime(arr_time.split('.')[0], "%Y-%m-%dT%H:%M:%S") - datetime.datetime.strptime(dep_time.split('.')[0], "%Y-%m-%dT%H:%M:%S")).total_seconds()/60
-                            dur_str = f"{int(dur//60)}h {int(dur%60)}m"
-                        except: dur_str = "N/A"
+                        flight_no = f"{airline}{f.get('flight',{}).get('iataNumber','')}"
+                        if (airline, flight_no, dep_time) in seen: continue
+                        seen.add((airline, flight_no, dep_time))
                         results.append({
-                            "Airline": airline, "Flight": f"{airline}{f.get('flight',{}).get('iataNumber','')}",
-                            "Origin": f.get('departure', {}).get('iataCode', origin), "Dep Time": dep_time.split('T')[-1][:5], "Dep Full": dep_time,
-                            "Dest": f.get('arrival', {}).get('iataCode', dest), "Arr Time": arr_time.split('T')[-1][:5], "Arr Full": arr_time,
-                            "Duration": dur_str, "Conn Apt": "Direct", "Conn Time": "N/A", "Conn Min": 0
+                            "Airline": airline, "Flight": flight_no,
+                            "Dep Time": dep_time.split('T')[-1][:5], "Dep Full": dep_time,
+                            "Arr Time": arr_time.split('T')[-1][:5], "Arr Full": arr_time,
+                            "Conn Apt": "Direct", "Conn Min": 0
                         })
                     if results: return results
             except: pass
         if SERPAPI_KEY:
-            try:
-                params = {"engine": "google_flights", "departure_id": origin, "arrival_id": dest, "outbound_date": date, "type": "2", "hl": "en", "gl": "us", "currency": "USD", "api_key": SERPAPI_KEY}
-                if not show_all_airlines: params["include_airlines"] = "WN,AA,DL,UA"
-                r = requests.get("https://serpapi.com/search", params=params)
-                data = r.json()
-                results = []
-                raw = data.get("best_flights", []) + data.get("other_flights", [])
-                for f in raw[:20]:
-                    legs = f.get('flights', [])
-                    if not legs: continue
-                    layovers = f.get('layovers', [])
-                    conn_apt = layovers[0].get('id', 'Direct') if layovers else "Direct"
-                    conn_min = layovers[0].get('duration', 0) if layovers else 0
-                    conn_time_str = f"{conn_min//60}h {conn_min%60}m" if layovers else "N/A"
-                    dep_full = legs[0].get('departure_airport', {}).get('time', '')
-                    arr_full = legs[-1].get('arrival_airport', {}).get('time', '')
-                    results.append({
-                        "Airline": legs[0].get('airline', 'UNK'),
-                        "Flight": " / ".join([l.get('flight_number', '') for l in legs]),
-                        "Origin": legs[0].get('departure_airport', {}).get('id', 'UNK'),
-                        "Dep Time": dep_full.split()[-1], "Dep Full": dep_full,
-                        "Dest": legs[-1].get('arrival_airport', {}).get('id', 'UNK'),
-                        "Arr Time": arr_full.split()[-1], "Arr Full": arr_full,
-                        "Duration": f"{f.get('total_duration',0)//60}h {f.get('total_duration',0)%60}m",
-                        "Conn Apt": conn_apt, "Conn Time": conn_time_str, "Conn Min": conn_min
-                    })
-                return results
+            try: return _serp_flights(origin, dest, date, show_all_airlines)
             except: return []
         return []
 
+@st.cache_resource(show_spinner=False)
+def get_tools():
+    # One shared engine per process: the master CSV, airport table and geocoder client are built once
+    return LogisticsTools()
+
 # ==============================================================================
 # 4. FLIGHT PLAN GENERATION
 # ==============================================================================
+DAY_ORDER = {"Mon": 0, "Tue": 1, "Wed": 2, "Thu": 3, "Fri": 4, "Sat": 5, "Sun": 6, "One-Time": 7}
+
 def create_flight_plan_table(plan_data, p_time, del_time, del_offset, p_code, d_code):
     # plan_data is a dictionary where key is Day and value is the 'edited' dataframe for that day
     plan_rows = []
-    day_order = {"Mon": 0, "Tue": 1, "Wed": 2, "Thu": 3, "Fri": 4, "Sat": 5, "Sun": 6}
     
     for day, df_day in plan_data.items():
         # Find Primary
@@ -366,7 +554,7 @@ def create_flight_plan_table(plan_data, p_time, del_time, del_offset, p_code, d_
         plan_rows.append({
             "DATE": p_flight['Dep DateTime Str'].split(' ')[0], # Extract MM/DD
             "DAY": day,
-            "REQ'D PICK UP": p_time.strftime('%H:%M'),
+            "REQ'D PICK UP": _hm(p_time),
             "ORIGIN": p_code,
             "DEST": d_code,
             "AIRLINE": p_flight['Airline'],
@@ -375,7 +563,7 @@ def create_flight_plan_table(plan_data, p_time, del_time, del_offset, p_code, d_
             "CNX FLT": cnx_flt,
             "CNX CITY": "Direct" if "Direct" in str(p_flight.get('Conn Apt', '')) else "Layover", # Simplified for display
             "ETA": p_flight['Arr DateTime Str'].split(' ')[1],
-            "DUE TIME": del_time.strftime('%H:%M') if del_time else 'N/A',
+            "DUE TIME": _hm(del_time) if del_time else 'N/A',
             "PREBOOK #": "",
             "BACKUP FLTS": backup_str,
             "BACKUP FLT TIMES": backup_time_str,
@@ -384,8 +572,7 @@ def create_flight_plan_table(plan_data, p_time, del_time, del_offset, p_code, d_
         
     df_plan = pd.DataFrame(plan_rows)
     if not df_plan.empty:
-        df_plan['SortKey'] = df_plan['DAY'].apply(lambda x: day_order.get(x, 99))
-        df_plan = df_plan.sort_values(by='SortKey').drop(columns='SortKey')
+        df_plan = df_plan.sort_values(by='DAY', key=lambda s: s.map(DAY_ORDER).fillna(99))
     return df_plan
 
 # ==============================================================================
@@ -399,60 +586,62 @@ mode_selection = st.sidebar.radio("Function", ["Flight Scheduler", "Flight Relia
 st.sidebar.markdown("**1. Shipment Mode**")
 mode = st.sidebar.radio("Frequency", ["One-Time (Ad-Hoc)", "Reoccurring"], label_visibility="collapsed")
 
-st.sidebar.markdown("**2. Locations**")
-p_addr = st.sidebar.text_input("Pickup Address", "2008 Altom Ct, St. Louis, MO 63146")
-p_manual = st.sidebar.text_input("Origin Override (Opt)", placeholder="e.g. STL")
-st.sidebar.markdown("⬇️")
-d_addr = st.sidebar.text_input("Delivery Address", "1250 E Hadley St, Phoenix, AZ 85034")
-d_manual = st.sidebar.text_input("Dest Override (Opt)", placeholder="e.g. PHX")
+# Layout toggles stay live; everything else is batched in a form so typing doesn't rerun the script
+has_deadline = st.sidebar.checkbox("Strict Delivery Deadline?", value=True)
 
-st.sidebar.markdown("**3. Timing**")
-p_time = st.sidebar.time_input("Ready Time", datetime.time(9, 0))
+with st.sidebar.form("route_inputs"):
+    st.markdown("**2. Locations**")
+    p_addr = st.text_input("Pickup Address", "2008 Altom Ct, St. Louis, MO 63146")
+    p_manual = st.text_input("Origin Override (Opt)", placeholder="e.g. STL")
+    st.markdown("⬇️")
+    d_addr = st.text_input("Delivery Address", "1250 E Hadley St, Phoenix, AZ 85034")
+    d_manual = st.text_input("Dest Override (Opt)", placeholder="e.g. PHX")
 
-if mode == "One-Time (Ad-Hoc)":
-    p_date = st.sidebar.date_input("Pickup Date", datetime.date.today() + datetime.timedelta(days=1))
-else:
-    p_date = datetime.date.today()
+    st.markdown("**3. Timing**")
+    p_time = st.time_input("Ready Time", datetime.time(9, 0))
 
-has_deadline = st.sidebar.checkbox("Strict Delivery Deadline?", value=True)
-del_date_obj = None
-del_time = None
-del_offset = 0
-
-if has_deadline:
-    default_del = p_date + datetime.timedelta(days=1)
-    del_date_obj = st.sidebar.date_input("Delivery Date", default_del)
-    del_time = st.sidebar.time_input("Must Arrive By", datetime.time(18, 0))
-    del_offset = (del_date_obj - p_date).days
-    if mode == "One-Time (Ad-Hoc)" and del_offset < 0:
-        st.sidebar.error("⚠️ Delivery Date cannot be before Pickup Date.")
-
-days_to_search = []
-if mode == "One-Time (Ad-Hoc)":
-    days_to_search = [{"day": "One-Time", "date": p_date.strftime("%Y-%m-%d")}]
-else:
-    st.sidebar.info(f"Pattern: Weekly (+{del_offset} Days)")
-    days_selected = st.sidebar.multiselect("Days", ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"], ["Mon", "Wed", "Fri"])
-    day_map = {"Mon":0, "Tue":1, "Wed":2, "Thu":3, "Fri":4, "Sat":5, "Sun":6}
-    today = datetime.date.today()
-    for d in days_selected:
-        target = day_map[d]
-        diff = target - today.weekday()
-        if diff < 0: diff += 7
-        if diff == 0 and mode == "Reoccurring": diff = 7
-        days_to_search.append({"day": d, "date": (today + datetime.timedelta(days=diff)).strftime("%Y-%m-%d")})
-    days_to_search.sort(key=lambda x: day_map.get(x['day'], 99))
-
-with st.sidebar.expander("⚙️ Adjusters & Filters"):
-    st.sidebar.markdown("**Time Buffers (Minutes)**")
-    custom_p_buff = st.sidebar.number_input("Pickup Buffer", value=120, step=30)
-    custom_d_buff = st.sidebar.number_input("Delivery Buffer", value=120, step=30)
-    st.sidebar.markdown("---")
-    min_conn_filter = st.sidebar.number_input("Min Conn (Minutes)", value=60, step=15)
-    st.sidebar.markdown("---")
-    show_all_airlines = st.sidebar.checkbox("Show All Airlines", value=False)
-
-run_btn = st.sidebar.button("🚀 Run Analysis", type="primary")
+    if mode == "One-Time (Ad-Hoc)":
+        p_date = st.date_input("Pickup Date", datetime.date.today() + datetime.timedelta(days=1))
+    else:
+        p_date = datetime.date.today()
+
+    del_date_obj = None
+    del_time = None
+    del_offset = 0
+
+    if has_deadline:
+        default_del = p_date + datetime.timedelta(days=1)
+        del_date_obj = st.date_input("Delivery Date", default_del)
+        del_time = st.time_input("Must Arrive By", datetime.time(18, 0))
+        del_offset = (del_date_obj - p_date).days
+        if mode == "One-Time (Ad-Hoc)" and del_offset < 0:
+            st.error("⚠️ Delivery Date cannot be before Pickup Date.")
+
+    days_to_search = []
+    if mode == "One-Time (Ad-Hoc)":
+        days_to_search = [{"day": "One-Time", "date": _ymd(p_date)}]
+    else:
+        st.info(f"Pattern: Weekly (+{del_offset} Days)")
+        days_selected = st.multiselect("Days", ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"], ["Mon", "Wed", "Fri"])
+        today = datetime.date.today()
+        for d in days_selected:
+            target = DAY_ORDER[d]
+            diff = target - today.weekday()
+            if diff < 0: diff += 7
+            if diff == 0 and mode == "Reoccurring": diff = 7
+            days_to_search.append({"day": d, "date": _ymd(today + datetime.timedelta(days=diff))})
+        days_to_search.sort(key=lambda x: DAY_ORDER.get(x['day'], 99))
+
+    with st.expander("⚙️ Adjusters & Filters"):
+        st.markdown("**Time Buffers (Minutes)**")
+        custom_p_buff = st.number_input("Pickup Buffer", value=120, step=30)
+        custom_d_buff = st.number_input("Delivery Buffer", value=120, step=30)
+        st.markdown("---")
+        min_conn_filter = st.number_input("Min Conn (Minutes)", value=60, step=15)
+        st.markdown("---")
+        show_all_airlines = st.checkbox("Show All Airlines", value=False)
+
+    run_btn = st.form_submit_button("🚀 Run Analysis", type="primary")
 
 # --- Session State ---
 if 'flight_plan_df' not in st.session_state: st.session_state.flight_plan_df = None
@@ -494,12 +683,23 @@ if run_btn:
         d1 = d2 = {"miles": 0, "time_str": "N/A", "time_min": 0}
         total_prep = total_post = 0
         valid_flights = []
+        if has_deadline and del_offset < 0: st.error("Delivery Date cannot be before Pickup Date."); st.stop()
         
-        tools = LogisticsTools()
+        tools = get_tools()
         
         with st.status("📡 Establishing Logistics Chain...", expanded=True) as status:
-            p_res = [tools.get_airport_details(p_manual)] if p_manual else tools.find_nearest_airports(p_addr)
-            d_res = [tools.get_airport_details(d_manual)] if d_manual else tools.find_nearest_airports(d_addr)
+            # Pickup and delivery sides are independent network round-trips; overlap them, and start
+            # each drive leg as soon as its own airport is known rather than waiting for both
+            d1_fut = d2_fut = None
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                p_fut = pool.submit(lambda: [tools.get_airport_details(p_manual)] if p_manual else tools.find_nearest_airports(p_addr))
+                d_fut = pool.submit(lambda: [tools.get_airport_details(d_manual)] if d_manual else tools.find_nearest_airports(d_addr))
+                p_res = p_fut.result()
+                if p_res and p_res[0]: d1_fut = pool.submit(tools.get_road_metrics, p_addr, p_res[0]['code'])
+                d_res = d_fut.result()
+                if d_res and d_res[0]: d2_fut = pool.submit(tools.get_road_metrics, d_res[0]['code'], d_addr)
+                d1 = d1_fut.result() if d1_fut else None
+                d2 = d2_fut.result() if d2_fut else None
             
             if not p_res or not p_res[0]: st.error("Pickup Location Error"); st.stop()
             if not d_res or not d_res[0]: st.error("Delivery Location Error"); st.stop()
@@ -507,18 +707,21 @@ if run_btn:
             p_apt, d_apt = p_res[0], d_res[0]
             p_code, p_name = p_apt['code'], p_apt['name']
             d_code, d_name = d_apt['code'], d_apt['name']
+            # Same airport at both ends: every flight search would come back empty, so skip them all
+            if p_code == d_code: st.warning(f"Pickup and delivery both resolve to {p_code}; this lane is ground-only."); st.stop()
             st.session_state.p_code, st.session_state.d_code = p_code, d_code
 
-            d1 = tools.get_road_metrics(p_addr, p_code) or {"miles": 20, "time_str": "30m", "time_min": 30}
-            d2 = tools.get_road_metrics(d_code, d_addr) or {"miles": 20, "time_str": "30m", "time_min": 30}
+            d1 = d1 or {"miles": 20, "time_str": "30m", "time_min": 30}
+            d2 = d2 or {"miles": 20, "time_str": "30m", "time_min": 30}
             st.session_state.drive_metrics = {'d1': d1, 'd2': d2, 'p_name': p_name, 'd_name': d_name}
             
             p_drive_used = max(d1['time_min'], custom_p_buff)
             total_prep = p_drive_used + 60 
             
-            base_dt = datetime.datetime.strptime(days_to_search[0]['date'], "%Y-%m-%d").date()
+            base_dt = datetime.date.fromisoformat(days_to_search[0]['date'])
             earliest_dep = datetime.datetime.combine(base_dt, p_time) + datetime.timedelta(minutes=total_prep)
-            st.session_state.earliest_dep_str = earliest_dep.strftime("%H:%M")
+            st.session_state.earliest_dep_str = _hm(earliest_dep)
+            earliest_dep_min = earliest_dep.hour * 60 + earliest_dep.minute
             
             latest_arr_dt = None
             if has_deadline and del_time:
@@ -526,109 +729,106 @@ if run_btn:
                 total_post = d_drive_used + 60
                 dummy_del = datetime.datetime.combine(base_dt + datetime.timedelta(days=del_offset), del_time)
                 latest_arr_dt = dummy_del - datetime.timedelta(minutes=total_post)
-                st.session_state.latest_arr_str = latest_arr_dt.strftime("%H:%M")
+                st.session_state.latest_arr_str = _hm(latest_arr_dt)
+            
+            # One search per day, all independent: issue them together and keep input order
+            with ThreadPoolExecutor(max_workers=max(1, min(8, len(days_to_search)))) as pool:
+                day_results = list(pool.map(lambda d: tools.search_flights(p_code, d_code, d['date'], show_all_airlines), days_to_search))
+            
+            # Cheapest integer checks first, once per day: invalid/too-early departures and short connections
+            # are dropped here, and the hours prefetch and the loop below both work from the survivors
+            day_cols = [_day_col(datetime.date.fromisoformat(d['date'])) for d in days_to_search]
+            day_flights = [[f for f in raw_data or ()
+                            if f['Dep Min'] is not None and f['Dep Min'] >= earliest_dep_min
+                            and (f['Conn Apt'] == "Direct" or f['Conn Min'] >= min_conn_filter)] for raw_data in day_results]
             
-            for day_obj in days_to_search:
-                raw_data = tools.search_flights(p_code, d_code, day_obj['date'], show_all_airlines)
-                if not raw_data: continue
+            # Cargo hours depend only on (airport, airline, hours column), and can fall through to a web
+            # search; fetch each combination once, together, using the first date that needs it
+            first_date = {}
+            for day_obj, col, flights in zip(days_to_search, day_cols, day_flights):
+                for f in flights: first_date.setdefault((f['Airline'], col), day_obj['date'])
+            hours_keys = [(code, al, col) for al, col in first_date for code in (p_code, d_code)]
+            airline_hours = {}
+            if hours_keys:
+                with ThreadPoolExecutor(max_workers=min(8, len(hours_keys))) as pool:
+                    hours_vals = list(pool.map(lambda k: tools.get_cargo_hours(k[0], k[1], datetime.date.fromisoformat(first_date[(k[1], k[2])])), hours_keys))
+                airline_hours = dict(zip(hours_keys, hours_vals))
+            # Summary cards list one line per (airport, airline): the first searched day's hours
+            for (code, al, _), h in airline_hours.items(): st.session_state.airline_hours_cache.setdefault((code, al), h)
+            
+            for day_obj, col, flights in zip(days_to_search, day_cols, day_flights):
+                if not flights: continue
+                if latest_arr_dt:
+                    day_dl = datetime.datetime.combine(datetime.date.fromisoformat(day_obj['date']) + datetime.timedelta(days=del_offset), del_time)
+                    loop_limit = day_dl - datetime.timedelta(minutes=total_post)
                 
-                for f in raw_data:
-                    reject_reason = None
-                    airline = f['Airline']
-                    s_date = datetime.datetime.strptime(day_obj['date'], "%Y-%m-%d").date()
-                    
-                    if (p_code, airline) not in st.session_state.airline_hours_cache:
-                        st.session_state.airline_hours_cache[(p_code, airline)] = tools.get_cargo_hours(p_code, airline, s_date)
-                    if (d_code, airline) not in st.session_state.airline_hours_cache:
-                        st.session_state.airline_hours_cache[(d_code, airline)] = tools.get_cargo_hours(d_code, airline, s_date)
-                    
-                    p_h = st.session_state.airline_hours_cache[(p_code, airline)]
-                    d_h = st.session_state.airline_hours_cache[(d_code, airline)]
-                    
-                    if p_h['hours'] == "No Cargo": reject_reason = "No Origin Cargo Facility"
-                    
-                    dep_time_only = datetime.datetime.strptime(f['Dep Time'], "%H:%M").time()
-                    base_dep_dt = datetime.datetime.combine(s_date, dep_time_only)
-                    tender_dt = base_dep_dt - datetime.timedelta(minutes=custom_p_buff)
-                    
-                    if not tools.check_time_in_range(tender_dt.strftime("%H:%M"), p_h['hours']): reject_reason = f"Origin Closed ({p_h['hours']})"
-                    if f['Dep Time'] < st.session_state.earliest_dep_str: reject_reason = f"Too Early ({f['Dep Time']})"
-                    if f['Conn Apt'] != "Direct" and f['Conn Min'] < min_conn_filter: reject_reason = "Short Connection"
-                    
-                    if latest_arr_dt:
-                        try:
-                            f_dt = parser.parse(f['Dep Full']).replace(tzinfo=None)
-                            f_arr_dt = parser.parse(f['Arr Full']).replace(tzinfo=None)
-                            if f_arr_dt < f_dt: f_arr_dt += datetime.timedelta(days=1)
-                            
-                            loop_dl = datetime.datetime.strptime(day_obj['date'], "%Y-%m-%d") + datetime.timedelta(days=del_offset)
-                            loop_dl = loop_dl.replace(hour=del_time.hour, minute=del_time.minute, tzinfo=None)
-                            loop_limit = loop_dl - datetime.timedelta(minutes=total_post)
-                            
-                            if f_arr_dt > loop_limit: reject_reason = "Arrives Too Late"
-                        except: pass
+                for f in flights:
+                    dep_min = f['Dep Min']
+                    p_h = airline_hours[(p_code, f['Airline'], col)]
+                    if p_h['hours'] == "No Cargo": continue  # no origin cargo facility
+                    tender_min = (dep_min - custom_p_buff) % 1440
+                    if not tools.check_minute_in_range(tender_min, p_h['hours']): continue  # origin closed at tender
                     
-                    if not reject_reason:
-                        try:
-                            dep_dt_full = parser.parse(f['Dep Full']).replace(tzinfo=None)
-                            arr_dt_full = parser.parse(f['Arr Full']).replace(tzinfo=None)
-                            if arr_dt_full < dep_dt_full: arr_dt_full += datetime.timedelta(days=1)
-
-                            f['Dep DateTime'] = dep_dt_full
-                            f['Arr DateTime'] = arr_dt_full
-                            
-                            air_transit_min = int((arr_dt_full - dep_dt_full).total_seconds() / 60)
-                            total_transit_min = total_prep + air_transit_min + total_post
-                            
-                            scheduled_recovery_dt = arr_dt_full + datetime.timedelta(minutes=60)
-                            recovery_note = ""
-
-                            if not tools.check_time_in_range(scheduled_recovery_dt.strftime("%H:%M"), d_h['hours']):
-                                next_open_dt = tools.get_next_open_time(scheduled_recovery_dt, d_h['hours'])
-                                actual_recovery_dt = next_open_dt + datetime.timedelta(minutes=30) 
-                                delay_min = int((actual_recovery_dt - scheduled_recovery_dt).total_seconds() / 60)
-                                if delay_min > 0:
-                                    total_transit_min += delay_min
-                                    recovery_note = f"⚠️ Recovery Delay: Avail {actual_recovery_dt.strftime('%m/%d %H:%M')}"
-
-                            f['Total Transit Min'] = total_transit_min
-                            f['Total Transit Str'] = f"{total_transit_min//60}h {total_transit_min%60}m"
-                            
-                            fra_score, fra_risk = 100, []
-                            if HAS_FRA and AVIATION_EDGE_KEY:
-                                flight_num_for_fra = f['Flight'].split(' / ')[0]
-                                res = analyze_reliability(flight_num_for_fra, AVIATION_EDGE_KEY)
-                                if "score" in res: fra_score, fra_risk = res['score'], res['risk_factors']
-                            
-                            note_parts = []
-                            if recovery_note: note_parts.append(recovery_note)
-                            if fra_risk: note_parts.append(f"⛈️ Risk: {fra_risk[0]}")
-                            
-                            f['Notes'] = " ".join(note_parts) if note_parts else "Standard Ops"
-                            f['Reliability'] = fra_score
-                            f['Days of Op'] = day_obj['day']
-                            f['Origin Hours'] = p_h['hours']
-                            f['Dest Hours'] = d_h['hours']
-                            f['Track'] = f"https://flightaware.com/live/flight/{f['Flight'].split(' / ')[0]}"
-                            
-                            valid_flights.append(f)
-                        except: pass
+                    try:
+                        dep_dt_full = _parse_dt(f['Dep Full'])
+                        arr_dt_full = _parse_dt(f['Arr Full'])
+                        if arr_dt_full < dep_dt_full: arr_dt_full += datetime.timedelta(days=1)
+                        if latest_arr_dt and arr_dt_full > loop_limit: continue  # arrives too late
+                        d_h = airline_hours[(d_code, f['Airline'], col)]
+
+                        f['Dep DateTime'] = dep_dt_full
+                        f['Arr DateTime'] = arr_dt_full
+                        
+                        air_transit_min = int((arr_dt_full - dep_dt_full).total_seconds() / 60)
+                        total_transit_min = total_prep + air_transit_min + total_post
+                        
+                        scheduled_recovery_dt = arr_dt_full + datetime.timedelta(minutes=60)
+                        recovery_note = ""
+
+                        if not tools.check_minute_in_range(scheduled_recovery_dt.hour * 60 + scheduled_recovery_dt.minute, d_h['hours']):
+                            next_open_dt = tools.get_next_open_time(scheduled_recovery_dt, d_h['hours'])
+                            actual_recovery_dt = next_open_dt + datetime.timedelta(minutes=30) 
+                            delay_min = int((actual_recovery_dt - scheduled_recovery_dt).total_seconds() / 60)
+                            if delay_min > 0:
+                                total_transit_min += delay_min
+                                recovery_note = f"⚠️ Recovery Delay: Avail {actual_recovery_dt.strftime('%m/%d %H:%M')}"
+
+                        f['Total Transit Min'] = total_transit_min
+                        f['Total Transit Str'] = f"{total_transit_min//60}h {total_transit_min%60}m"
+                        
+                        fra_score, fra_risk = 100, []
+                        if HAS_FRA and AVIATION_EDGE_KEY:
+                            flight_num_for_fra = f['Flight'].split(' / ')[0]
+                            res = analyze_reliability(flight_num_for_fra, AVIATION_EDGE_KEY)
+                            if "score" in res: fra_score, fra_risk = res['score'], res['risk_factors']
+                        
+                        note_parts = []
+                        if recovery_note: note_parts.append(recovery_note)
+                        if fra_risk: note_parts.append(f"⛈️ Risk: {fra_risk[0]}")
+                        
+                        f['Notes'] = " ".join(note_parts) if note_parts else "Standard Ops"
+                        f['Reliability'] = fra_score
+                        f['Days of Op'] = day_obj['day']
+                        f['Origin Hours'] = p_h['hours']
+                        f['Dest Hours'] = d_h['hours']
+                        f['Track'] = f"https://flightaware.com/live/flight/{f['Flight'].split(' / ')[0]}"
+                        
+                        valid_flights.append(f)
+                    except: pass
 
             valid_flights.sort(key=lambda x: (x['Days of Op'], x['Total Transit Min']))
             st.session_state.valid_flights = valid_flights
             
-            # Group flights by day for the Interactive Editor
+            # Group flights by day for the Interactive Editor (one frame, split per day)
             grouped = {}
-            for f in valid_flights:
-                day = f['Days of Op']
-                if day not in grouped: grouped[day] = []
+            if valid_flights:
+                df_valid = pd.DataFrame(valid_flights)
                 # Add checkboxes init state
-                f_display = f.copy()
-                f_display['Primary'] = False
-                f_display['Backup'] = False
-                f_display['Dep DateTime Str'] = f['Dep DateTime'].strftime('%m/%d %H:%M')
-                f_display['Arr DateTime Str'] = f['Arr DateTime'].strftime('%m/%d %H:%M')
-                grouped[day].append(f_display)
+                df_valid['Primary'] = False
+                df_valid['Backup'] = False
+                df_valid['Dep DateTime Str'] = df_valid['Dep DateTime'].dt.strftime('%m/%d %H:%M')
+                df_valid['Arr DateTime Str'] = df_valid['Arr DateTime'].dt.strftime('%m/%d %H:%M')
+                grouped = {day: g.reset_index(drop=True) for day, g in df_valid.groupby('Days of Op', sort=False)}
             
             st.session_state.grouped_flights = grouped
             status.update(label="Mission Plan Generated", state="complete", expanded=False)
@@ -657,19 +857,11 @@ if st.session_state.valid_flights:
     deadline_date_str = (best_pickup_dt + datetime.timedelta(days=del_offset)).strftime('%m/%d')
     
     st.markdown("### ⛓️ Logistics Chain Visualization")
-    st.markdown(f"""
-    <div class="timeline-container">
-        <div class="timeline-point"><div style="font-size:24px">📦</div><div style="font-weight:bold">Pickup</div><div style="color:#4ade80; font-size: 0.8rem;">{best_pickup_date_str}</div><div style="color:#4ade80">{p_time.strftime('%H:%M')}</div></div>
-        <div class="timeline-line"></div>
-        <div class="timeline-point"><div style="font-size:24px">🚛</div><div style="font-size:12px; color:#94a3b8">{d1['time_str']}</div></div>
-        <div class="timeline-line"></div>
-        <div class="timeline-point"><div style="font-size:24px">🛫</div><div style="font-weight:bold">Departs</div><div style="color:#facc15; font-size: 0.8rem;">{best_dep_date}</div><div style="color:#facc15">{best['Dep Time']}</div></div>
-        <div class="timeline-line"></div>
-        <div class="timeline-point"><div style="font-size:24px">🛬</div><div style="font-weight:bold">Arrives</div><div style="color:#facc15; font-size: 0.8rem;">{best_arr_date}</div><div style="color:#facc15">{best['Arr Time']}</div></div>
-        <div class="timeline-line"></div>
-        <div class="timeline-point"><div style="font-size:24px">🏁</div><div style="font-weight:bold">Deadline</div><div style="color:#f87171; font-size: 0.8rem;">{deadline_date_str}</div><div style="color:#f87171">{del_time.strftime('%H:%M') if del_time else 'Open'}</div></div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(CHAIN_HTML.format_map({
+        "pickup_date": best_pickup_date_str, "pickup_time": _hm(p_time), "drive_time": d1['time_str'],
+        "dep_date": best_dep_date, "dep_time": best['Dep Time'], "arr_date": best_arr_date, "arr_time": best['Arr Time'],
+        "deadline_date": deadline_date_str, "deadline_time": _hm(del_time) if del_time else 'Open',
+    }), unsafe_allow_html=True)
 
     # --- Origin/Dest Cards ---
     unique_airlines = sorted(list(set(f['Airline'] for f in valid_flights)))
@@ -678,9 +870,9 @@ if st.session_state.valid_flights:
     
     c1, c2 = st.columns(2)
     with c1:
-        st.markdown(f"""<div class="metric-card"><div class="metric-header">ORIGIN: {p_code}</div><div class="metric-value">{st.session_state.drive_metrics['p_name']}</div><div style="margin-top:10px; font-size:0.9rem">📍 <strong>Drive:</strong> {d1['miles']} mi ({d1['time_str']})<br>🗓️ <strong>Pickup Date:</strong> {best_pickup_date_str} ({p_time.strftime('%H:%M')})<br>⏰ <strong>Earliest Dep:</strong> {st.session_state.earliest_dep_str}<br>🏢 <strong>Cargo Hours:</strong><br><div style="font-size: 0.8rem; margin-top: 5px;">{"<br>".join(origin_hours_list)}</div></div></div>""", unsafe_allow_html=True)
+        st.markdown(f"""<div class="metric-card"><div class="metric-header">ORIGIN: {p_code}</div><div class="metric-value">{st.session_state.drive_metrics['p_name']}</div><div style="margin-top:10px; font-size:0.9rem">📍 <strong>Drive:</strong> {d1['miles']} mi ({d1['time_str']})<br>🗓️ <strong>Pickup Date:</strong> {best_pickup_date_str} ({_hm(p_time)})<br>⏰ <strong>Earliest Dep:</strong> {st.session_state.earliest_dep_str}<br>🏢 <strong>Cargo Hours:</strong><br><div style="font-size: 0.8rem; margin-top: 5px;">{"<br>".join(origin_hours_list)}</div></div></div>""", unsafe_allow_html=True)
     with c2:
-        st.markdown(f"""<div class="metric-card"><div class="metric-header">DESTINATION: {d_code}</div><div class="metric-value">{st.session_state.drive_metrics['d_name']}</div><div style="margin-top:10px; font-size:0.9rem">📍 <strong>Drive:</strong> {d2['miles']} mi ({d2['time_str']})<br>🗓️ <strong>Deadline:</strong> {deadline_date_str} ({del_time.strftime('%H:%M') if del_time else 'Open'})<br>⏰ <strong>Latest Arr:</strong> {st.session_state.latest_arr_str}<br>🏢 <strong>Cargo Hours:</strong><br><div style="font-size: 0.8rem; margin-top: 5px;">{"<br>".join(dest_hours_list)}</div></div></div>""", unsafe_allow_html=True)
+        st.markdown(f"""<div class="metric-card"><div class="metric-header">DESTINATION: {d_code}</div><div class="metric-value">{st.session_state.drive_metrics['d_name']}</div><div style="margin-top:10px; font-size:0.9rem">📍 <strong>Drive:</strong> {d2['miles']} mi ({d2['time_str']})<br>🗓️ <strong>Deadline:</strong> {deadline_date_str} ({_hm(del_time) if del_time else 'Open'})<br>⏰ <strong>Latest Arr:</strong> {st.session_state.latest_arr_str}<br>🏢 <strong>Cargo Hours:</strong><br><div style="font-size: 0.8rem; margin-top: 5px;">{"<br>".join(dest_hours_list)}</div></div></div>""", unsafe_allow_html=True)
 
     st.markdown("---")
 
@@ -694,13 +886,12 @@ if st.session_state.valid_flights:
         # Columns to show in editor
         editor_cols = ["Primary", "Backup", "Airline", "Flight", "Dep DateTime Str", "Arr DateTime Str", "Total Transit Str", "Notes", "Reliability"]
         
-        day_map = {"Mon":0, "Tue":1, "Wed":2, "Thu":3, "Fri":4, "Sat":5, "Sun":6}
-        sorted_days = sorted(st.session_state.grouped_flights.keys(), key=lambda d: day_map.get(d, 99))
+        sorted_days = sorted(st.session_state.grouped_flights.keys(), key=lambda d: DAY_ORDER.get(d, 99))
         
         with st.form("flight_selector_form"):
             for day in sorted_days:
                 st.subheader(f"🗓️ {day}")
-                flights_df = pd.DataFrame(st.session_state.grouped_flights[day])
+                flights_df = st.session_state.grouped_flights[day]
                 
                 # Use Data Editor for checkboxes
                 edited_df = st.data_editor(
@@ -730,14 +921,15 @@ if st.session_state.valid_flights:
     # ONE-TIME MODE DISPLAY
     elif mode == "One-Time (Ad-Hoc)" and valid_flights:
         st.markdown("### ✅ Recommended Flights (One-Time)")
-        df_ot = pd.DataFrame(valid_flights)
+        df_ot = pd.DataFrame(valid_flights, columns=["Airline", "Flight", "Dep DateTime", "Arr DateTime", "Origin Hours", "Dest Hours", "Total Transit Min", "Total Transit Str", "Notes", "Reliability", "Track"])
         df_ot = df_ot.sort_values(by='Total Transit Min')
         df_ot['Dep DateTime Str'] = df_ot['Dep DateTime'].dt.strftime('%m/%d %H:%M')
         df_ot['Arr DateTime Str'] = df_ot['Arr DateTime'].dt.strftime('%m/%d %H:%M')
         
         cols_ot = ["Airline", "Flight", "Dep DateTime Str", "Arr DateTime Str", "Origin Hours", "Dest Hours", "Total Transit Str", "Notes", "Reliability", "Track"]
         st.dataframe(
-            df_ot[cols_ot], 
+            df_ot, 
+            column_order=cols_ot,
             hide_index=True, 
             use_container_width=True,
             column_config={
@@ -755,7 +947,7 @@ if st.session_state.valid_flights:
 if st.session_state.flight_plan_df is not None:
     st.markdown("## ✈️ Final Recurring Flight Plan")
     PLAN_COLUMNS = ["DATE", "DAY", "REQ'D PICK UP", "ORIGIN", "DEST", "AIRLINE", "FLT #", "ETD", "CNX FLT", "CNX CITY", "ETA", "DUE TIME", "PREBOOK #", "BACKUP FLTS", "BACKUP FLT TIMES", "NOTES"]
-    st.dataframe(st.session_state.flight_plan_df[PLAN_COLUMNS], hide_index=True, use_container_width=True)
+    st.dataframe(st.session_state.flight_plan_df, column_order=PLAN_COLUMNS, hide_index=True, use_container_width=True)
     st.markdown("---")
 elif run_btn and not st.session_state.valid_flights:
     st.error("No valid flights found.")
@@ -0,0 +1,129 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+
+# --- 1. STORAGE LAYER ---
+# A single SQLite file survives app restarts and redeploys (unlike st.cache_data),
+# so repeat geocodes and flight searches don't hit the paid APIs again.
+DB_PATH = os.environ.get("CARGO_CACHE_DB", "cargo_cache.db")
+GEO_HIT_TTL_SEC = 30 * 86400
+GEO_MISS_TTL_SEC = 3600
+FLIGHT_TTL_MIN_SEC = 300
+FLIGHT_TTL_MAX_SEC = 12 * 3600
+WEB_HOURS_TTL_SEC = 7 * 86400
+ROUTE_TTL_SEC = 30 * 86400
+
+_conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+_lock = threading.Lock()
+with _lock:
+    _conn.execute("CREATE TABLE IF NOT EXISTS geo (k TEXT PRIMARY KEY, lat REAL, lon REAL, ts INTEGER)")
+    _conn.execute("CREATE TABLE IF NOT EXISTS flights (k TEXT PRIMARY KEY, payload TEXT, ts INTEGER)")
+    _conn.execute("CREATE TABLE IF NOT EXISTS web_hours (k TEXT PRIMARY KEY, snippet TEXT, ts INTEGER)")
+    _conn.execute("CREATE TABLE IF NOT EXISTS routes (k TEXT PRIMARY KEY, payload TEXT, ts INTEGER)")
+    _conn.commit()
+
+def _norm(text):
+    return re.sub(r"\s+", " ", str(text).strip().lower())
+
+# --- 2. GEOCODES ---
+def load_coords(address):
+    """
+    Returns the cached (lat, lon) for an address, False if no provider recently found it, or None on a miss.
+    """
+    with _lock:
+        row = _conn.execute("SELECT lat, lon, ts FROM geo WHERE k=?", (_norm(address),)).fetchone()
+    if not row: return None
+    age = time.time() - row[2]
+    if row[0] is None: return False if age <= GEO_MISS_TTL_SEC else None
+    # Re-geocode hits after a month so corrected provider data eventually replaces old coordinates
+    return (row[0], row[1]) if age <= GEO_HIT_TTL_SEC else None
+
+def save_coords(address, coords):
+    # coords=None records a definite no-result so bad addresses aren't re-queried for GEO_MISS_TTL_SEC;
+    # never pass it for a timeout or throttle, or one blip blocks a good address across restarts
+    lat, lon = (float(coords[0]), float(coords[1])) if coords else (None, None)
+    with _lock:
+        _conn.execute("INSERT OR REPLACE INTO geo VALUES (?,?,?,?)", (_norm(address), lat, lon, int(time.time())))
+        _conn.commit()
+
+# --- 3. FLIGHT SEARCHES ---
+def _flight_key(origin, dest, date, show_all):
+    return f"{origin.upper()}|{dest.upper()}|{date}|{int(bool(show_all))}"
+
+def flight_ttl(date):
+    """
+    Freshness window for a search: schedules for today change quickly, far-out dates barely move.
+    """
+    try: horizon = time.mktime(time.strptime(date, "%Y-%m-%d")) - time.time()
+    except ValueError: return FLIGHT_TTL_MIN_SEC
+    return int(max(FLIGHT_TTL_MIN_SEC, min(FLIGHT_TTL_MAX_SEC, horizon)))
+
+def load_flights(origin, dest, date, show_all, max_age=None):
+    """
+    Returns the cached flight list for a search, or None if missing or stale (max_age defaults to flight_ttl(date)).
+    """
+    if max_age is None: max_age = flight_ttl(date)
+    with _lock:
+        row = _conn.execute("SELECT payload, ts FROM flights WHERE k=?", (_flight_key(origin, dest, date, show_all),)).fetchone()
+    if not row or time.time() - row[1] > max_age:
+        return None
+    return json.loads(row[0])
+
+def save_flights(origin, dest, date, show_all, results):
+    with _lock:
+        _conn.execute("INSERT OR REPLACE INTO flights VALUES (?,?,?)", (_flight_key(origin, dest, date, show_all), json.dumps(results), int(time.time())))
+        _conn.commit()
+
+def purge_past_flights():
+    """
+    Deletes cached searches whose departure date has passed; they can never be requested again.
+    """
+    today = time.strftime("%Y-%m-%d")
+    with _lock:
+        stale = [(k,) for (k,) in _conn.execute("SELECT k FROM flights") if k.split("|")[2] < today]
+        _conn.executemany("DELETE FROM flights WHERE k=?", stale)
+        _conn.commit()
+
+purge_past_flights()
+
+# --- 4. WEB CARGO-HOURS SNIPPETS ---
+def _hours_key(airline, airport_code, day_name):
+    return f"{_norm(airline)}|{airport_code.upper()}|{day_name.lower()}"
+
+def load_web_hours(airline, airport_code, day_name, max_age=WEB_HOURS_TTL_SEC):
+    """
+    Returns the cached web-search hours snippet, or None if missing or older than max_age seconds.
+    """
+    with _lock:
+        row = _conn.execute("SELECT snippet, ts FROM web_hours WHERE k=?", (_hours_key(airline, airport_code, day_name),)).fetchone()
+    if not row or time.time() - row[1] > max_age:
+        return None
+    return row[0]
+
+def save_web_hours(airline, airport_code, day_name, snippet):
+    with _lock:
+        _conn.execute("INSERT OR REPLACE INTO web_hours VALUES (?,?,?)", (_hours_key(airline, airport_code, day_name), snippet, int(time.time())))
+        _conn.commit()
+
+# --- 5. ROAD ROUTES ---
+def _route_key(lat1, lon1, lat2, lon2):
+    # ~10 m precision: the same pickup address or airport always lands on the same key
+    return f"{lat1:.4f},{lon1:.4f}|{lat2:.4f},{lon2:.4f}"
+
+def load_route(lat1, lon1, lat2, lon2, max_age=ROUTE_TTL_SEC):
+    """
+    Returns the cached drive metrics dict between two points, or None if missing or older than max_age seconds.
+    """
+    with _lock:
+        row = _conn.execute("SELECT payload, ts FROM routes WHERE k=?", (_route_key(lat1, lon1, lat2, lon2),)).fetchone()
+    if not row or time.time() - row[1] > max_age:
+        return None
+    return json.loads(row[0])
+
+def save_route(lat1, lon1, lat2, lon2, metrics):
+    with _lock:
+        _conn.execute("INSERT OR REPLACE INTO routes VALUES (?,?,?)", (_route_key(lat1, lon1, lat2, lon2), json.dumps(metrics), int(time.time())))
+        _conn.commit()
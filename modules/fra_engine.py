@@ -1,8 +1,16 @@
 import requests
 import datetime
 from dateutil import parser
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # --- 1. DATA FETCHING LAYER ---
+# One pooled session for both hosts: analyze_reliability runs once per accepted flight,
+# so keep-alive saves a TCP+TLS handshake on every call after the first.
+_http = requests.Session()
+_http.headers["User-Agent"] = "CargoApp/1.0"
+_http.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504])))
+
 def get_flight_details(flight_iata, api_key):
     """
     Pulls live/scheduled flight data from Aviation Edge.
@@ -14,7 +22,7 @@ def get_flight_details(flight_iata, api_key):
     }
     
     try:
-        response = requests.get(base_url, params=params, timeout=10)
+        response = _http.get(base_url, params=params, timeout=10)
         data = response.json()
         
         # Aviation Edge returns a list. If empty, flight isn't active/found.
@@ -42,7 +50,7 @@ def get_weather_forecast(icao_code):
     url = f"https://aviationweather.gov/api/data/taf?ids={icao_code}&format=json"
     
     try:
-        r = requests.get(url, timeout=10)
+        r = _http.get(url, timeout=10)
         data = r.json()
         if not data:
             return None